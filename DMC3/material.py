@@ -0,0 +1,160 @@
+#DMC3\material.py:
+from __future__ import annotations
+
+import random
+from pathlib import Path
+
+import bpy
+
+# ID property tagging images/materials with the texture they were made from,
+# so the registry can find them again after a reload or in a saved .blend
+KEY_PROP = "dmc3_texture_key"
+
+#=====================================================================
+#   Node setups
+#=====================================================================
+def _random_diffuse() -> tuple:
+    # Cor aleatória para o material
+    return (
+        random.uniform(0.2, 0.8),
+        random.uniform(0.2, 0.8),
+        random.uniform(0.2, 0.8),
+        1.0
+    )
+
+def new_vertex_colour_material(name: str) -> bpy.types.Material:
+    material_vert_col = bpy.data.materials.new(name=name)
+    material_vert_col.use_nodes = True
+    nodes = material_vert_col.node_tree.nodes
+    # Limpar nós existentes
+    nodes.clear()
+    output_node = nodes.new(type='ShaderNodeOutputMaterial')
+    vert_col_node = nodes.new(type='ShaderNodeVertexColor')
+    vert_col_node.layer_name = "Baked Lighting"
+    diffuse_node = nodes.new(type='ShaderNodeBsdfDiffuse')
+    links = material_vert_col.node_tree.links
+    links.new(vert_col_node.outputs['Color'], diffuse_node.inputs['Color'])
+    links.new(diffuse_node.outputs['BSDF'], output_node.inputs['Surface'])
+
+    # Organizar nós
+    vert_col_node.location = (0, 0)
+    diffuse_node.location = (300, 0)
+    output_node.location = (600, 0)
+
+    material_vert_col.diffuse_color = _random_diffuse()
+    return material_vert_col
+
+def new_texture_material(name: str, img: bpy.types.Image) -> bpy.types.Material:
+    mat = bpy.data.materials.new(name=name)
+    mat.use_nodes = True
+    nodes = mat.node_tree.nodes
+    links = mat.node_tree.links
+
+    # Limpar nós existentes
+    nodes.clear()
+
+    # Criar novos nós
+    output_node = nodes.new(type='ShaderNodeOutputMaterial')
+    bsdf = nodes.new(type='ShaderNodeBsdfPrincipled')
+    tex_node = nodes.new(type='ShaderNodeTexImage')
+    tex_node.image = img
+
+    # Configurar Roughness para 1.0
+    bsdf.inputs['Roughness'].default_value = 1.0
+
+    # Configurar IOR para 1.0
+    bsdf.inputs['IOR'].default_value = 1.0
+
+    # Conectar nós
+    links.new(tex_node.outputs['Color'], bsdf.inputs['Base Color'])
+    links.new(tex_node.outputs['Alpha'], bsdf.inputs['Alpha'])
+    links.new(bsdf.outputs['BSDF'], output_node.inputs['Surface'])
+
+    # Organizar nós com posicionamento adequado
+    tex_node.location = (0, 0)
+    bsdf.location = (300, 0)
+    output_node.location = (600, 0)
+
+    mat.diffuse_color = _random_diffuse()
+    return mat
+
+
+#=====================================================================
+#   Session registry
+#=====================================================================
+class MaterialRegistry:
+    """
+    Images and materials created by the importer, keyed by texture key and
+    shared by every mesh of every import in the Blender session. Only names
+    are kept; datablocks are looked up again on use, so a File > Open or an
+    undo never leaves the registry holding freed IDs.
+    """
+    VERTEX_COLOUR_KEY = "<vertex colour>"
+
+    def __init__(self):
+        self._images: dict[str, str] = {}
+        self._materials: dict[str, str] = {}
+
+
+    def _find(self, names: dict[str, str], collection, key: str):
+        name = names.get(key)
+        if name is not None:
+            block = collection.get(name)
+            if block is not None and block.get(KEY_PROP) == key:
+                return block
+
+        # miss or stale name (File > Open, append, rename): rescan the tagged datablocks
+        names.clear()
+        for block in collection:
+            block_key = block.get(KEY_PROP)
+            if block_key is not None:
+                names.setdefault(block_key, block.name)
+
+        name = names.get(key)
+        return collection.get(name) if name is not None else None
+
+    def _register(self, names: dict[str, str], block, key: str) -> None:
+        block[KEY_PROP] = key
+        names[key] = block.name
+
+
+    def image(self, key: str, path: Path, name: str | None = None) -> bpy.types.Image | None:
+        img = self._find(self._images, bpy.data.images, key)
+
+        if img is None:
+            try:
+                print(f"[DMC3 Import] Carregando textura: {path}")
+                img = bpy.data.images.load(str(path), check_existing=False)
+            except Exception as e:
+                print(f"[DMC3 Import] Erro carregando imagem {path}: {e}")
+                return None
+
+            if name:
+                img.name = name
+
+            self._register(self._images, img, key)
+
+        return img
+
+    def texture_material(self, key: str, name: str, img: bpy.types.Image) -> bpy.types.Material:
+        mat = self._find(self._materials, bpy.data.materials, key)
+
+        if mat is None:
+            mat = new_texture_material(name, img)
+            self._register(self._materials, mat, key)
+            print(f"[DMC3 Import] Criado material: {mat.name}")
+
+        return mat
+
+    def vertex_colour_material(self) -> bpy.types.Material:
+        # Material para vertex colors (apenas para SCM sem texturas)
+        mat = self._find(self._materials, bpy.data.materials, self.VERTEX_COLOUR_KEY)
+
+        if mat is None:
+            mat = bpy.data.materials.get("Baked Lighting") or new_vertex_colour_material("Baked Lighting")
+            self._register(self._materials, mat, self.VERTEX_COLOUR_KEY)
+
+        return mat
+
+
+registry = MaterialRegistry()
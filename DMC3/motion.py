@@ -5,11 +5,15 @@ import os
 import sys
 import bpy
 import importlib
+import hashlib
 import math
+import re
+import struct
+import numpy as np
 
+from concurrent.futures import ThreadPoolExecutor
 from enum import IntEnum
 from io import BufferedReader
-from mathutils import Vector, Matrix, Euler
 from typing import NewType
 
 # Path Hack
@@ -17,8 +21,9 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 # Import and reload common utilities
 import common
-from common.io import ReadUInt16, ReadUInt32, ReadFloat, ReadSInt32
-from common.scene import frame_timeline
+from common.io import BinaryView, float32, uint16
+from common.animutils import DecimateKeys, MatrixToQuat, PositionsToRest, RotationsToRest
+from common.scene import fill_fcurve, frame_timeline
 importlib.reload(common.io)
 
 #=====================================================================
@@ -35,6 +40,15 @@ class TrackFlags(IntEnum):
     SCALE_Y       = 1 << 1
     SCALE_Z       = 1 << 0
 
+ALL_CHANNELS = 0x1ff
+
+# Channel groups for selective imports
+CHANNEL_FLAGS = {
+    'LOCATION': TrackFlags.TRANSLATION_X | TrackFlags.TRANSLATION_Y | TrackFlags.TRANSLATION_Z,
+    'ROTATION': TrackFlags.ROTATION_X | TrackFlags.ROTATION_Y | TrackFlags.ROTATION_Z,
+    'SCALE':    TrackFlags.SCALE_X | TrackFlags.SCALE_Y | TrackFlags.SCALE_Z,
+}
+
 # Compression types
 class Compression(IntEnum):
     LINEAR_FLOAT32   = 0
@@ -64,6 +78,46 @@ AxisZ = NewType('AxisZ', Axis.Z)
         
 EPSILON_16 = (0.000015259022) # 1./65535.
 
+# Binary layouts (little endian)
+MOTION_HEADER = struct.Struct('<IiffffHHH')
+TRACK_HEADER = struct.Struct('<HHHHff')
+TANGENT_RANGES = struct.Struct('<ffff')
+
+# Key layouts per compression type. The top bit of time is a flag (uknFlag).
+# The float32 layouts are inferred from the int16 ones; a track whose header
+# size disagrees with its layout is skipped rather than trusted.
+KEY_DTYPES = {
+    Compression.LINEAR_FLOAT32:  np.dtype([('time', '<u2'), ('pad', '<u2'), ('value', '<f4')]),
+    Compression.HERMITE_FLOAT32: np.dtype([('time', '<u2'), ('pad', '<u2'), ('value', '<f4'),
+                                           ('inTangent', '<f4'), ('outTangent', '<f4')]),
+    Compression.LINEAR_INT16:    np.dtype([('time', '<u2'), ('value', '<u2')]),
+    Compression.HERMITE_INT16:   np.dtype([('time', '<u2'), ('value', '<u2'),
+                                           ('inTangent', '<u2'), ('outTangent', '<u2')]),
+}
+
+def LayoutSize(comprsnType: int, keyCount: int) -> int | None:
+    """Bytes a track takes with the given key layout, header included; None for unknown types."""
+    if comprsnType not in KEY_DTYPES:
+        return None
+
+    size = TRACK_HEADER.size + keyCount * KEY_DTYPES[comprsnType].itemsize
+    if comprsnType == Compression.HERMITE_INT16:
+        size += TANGENT_RANGES.size
+
+    return size
+
+def TrackSize(f: BinaryView, offset: int) -> int:
+    """Bytes the track at offset takes, from its header size; its key layout only when that field is empty."""
+    size, keyCount, comprsnType, *_ = f.read_struct(TRACK_HEADER, offset)
+    if size >= TRACK_HEADER.size:
+        return size
+
+    layoutSize = LayoutSize(comprsnType, keyCount)
+    if layoutSize is None:
+        raise ValueError( f"Track at {hex(offset)} has neither a size nor a known compression type ({comprsnType})" )
+
+    return layoutSize
+
 #=====================================================================
 #   Hermite spline interpolation
 #=====================================================================
@@ -83,32 +137,6 @@ def Hermite(currentFrameTime: float, p0_value: float, p0_time: float, p0_outTang
 def linear_interpolate(a: float, b: float, factor: float) -> float:
     return a + (b - a) * factor
 
-#=====================================================================
-#   Keyframe
-#=====================================================================
-class Keyframe:
-    timeIndex: uint16
-    uknFlag: int
-    value: float
-    inTangent: float
-    outTanget: float
-
-    
-    def __init__(self, track: Track, f: BufferedReader):
-        tmp: int = ReadUInt16(f)
-        self.timeIndex = tmp & 0x7fff
-        self.uknFlag = tmp >> 15
-        self.value = ReadUInt16(f) * track.range * EPSILON_16 + track.min
-
-        # if 'rotation_euler' in track.transformType:
-        #     self.value = 180. - self.value
-        #     self.value = degrees(self.value)
-
-        if track.comprsnType == Compression.HERMITE_INT16:
-            self.inTangent = ReadUInt16(f) * track.inRange * EPSILON_16 + track.inTMin
-            self.outTanget = ReadUInt16(f) * track.outRange * EPSILON_16 + track.outTMin
-
-
 #=====================================================================
 #   Track
 #=====================================================================
@@ -125,53 +153,141 @@ class Track:
     inRange: float
     outTMin: float
     outRange: float
-    keys: list[Keyframe]
-
-
-    def __init__(self, type: tuple[str, TRACK_TYPE], trackAxis: Axis, f: BufferedReader):
-        # print( f"   Reading track at {hex( f.tell() )}" )
-        self.size = ReadUInt16(f)
-        self.keyCount = ReadUInt16(f)
-        self.comprsnType = Compression( ReadUInt16(f) )
-        self.startTime = ReadUInt16(f)
-        self.min = ReadFloat(f)
-        self.range = ReadFloat(f)
+    times: np.ndarray
+    flags: np.ndarray
+    values: np.ndarray
+    inTangents: np.ndarray
+    outTangents: np.ndarray
+    end: int
+    valid: bool
+
+
+    def __init__(self, type: tuple[str, TRACK_TYPE], trackAxis: Axis, f: BinaryView, offset: int):
+        # print( f"   Reading track at {hex(offset)}" )
+        (self.size, self.keyCount, comprsnType,
+         self.startTime, self.min, self.range) = f.read_struct(TRACK_HEADER, offset)
         self.transformType = type
         self.trackAxis = trackAxis
 
-        if self.comprsnType == Compression.HERMITE_INT16:
-            self.inTMin = ReadFloat(f)
-            self.inRange = ReadFloat(f)
-            self.outTMin = ReadFloat(f)
-            self.outRange = ReadFloat(f)
-    
-            self.keys = [ Keyframe(self, f) for _ in range(self.keyCount) ]
-
-        elif self.comprsnType != Compression.LINEAR_INT16:
-            print( f" Unsupported compression type at {hex( f.tell() )}" )
+        # the header's size is what steps to the next track; the key layout only has to agree with it
+        layoutSize = LayoutSize(comprsnType, self.keyCount)
+        if self.size >= TRACK_HEADER.size:
+            self.end = offset + self.size
+        elif layoutSize is not None:
+            print( f" Track at {hex(offset)} has no size, using its {Compression(comprsnType).name} layout" )
+            self.end = offset + layoutSize
+        else:
+            raise ValueError( f"Track at {hex(offset)} has neither a size nor a known compression type ({comprsnType})" )
+
+        self.valid = layoutSize is not None and offset + layoutSize == self.end
+        if not self.valid:
+            print( f" Skipped track at {hex(offset)}: compression {comprsnType} with {self.keyCount} keys "
+                   f"doesn't fill its {self.size} bytes" )
             return
 
-    
-    def SampleKeyframe(self, frameTime: float, i: int, t: float):
-        p0 = self.keys[i-1]
-        p1 = self.keys[i]
+        self.comprsnType = Compression(comprsnType)
+        keysOffset = offset + TRACK_HEADER.size
+
+        if self.comprsnType == Compression.HERMITE_INT16:
+            (self.inTMin, self.inRange,
+             self.outTMin, self.outRange) = f.read_struct(TANGENT_RANGES, keysOffset)
+            keysOffset += TANGENT_RANGES.size
+
+        self.DecodeKeys( f.read_array(KEY_DTYPES[self.comprsnType], self.keyCount, keysOffset) )
+
+
+    def DecodeKeys(self, raw: np.ndarray) -> None:
+        """Splits the raw key records into time, flag, value and tangent columns."""
+        self.times = (raw['time'] & 0x7fff).astype(np.int32)
+        self.flags = (raw['time'] >> 15).astype(np.uint8)
 
         match self.comprsnType:
-            case Compression.HERMITE_INT16 | Compression.HERMITE_FLOAT32:
-                return Hermite(float(frameTime), p0.value, p0.timeIndex, p0.outTanget, p1.value, p1.timeIndex, p1.inTangent)
+            case Compression.LINEAR_INT16 | Compression.HERMITE_INT16:
+                # same operation order as the scalar decode, so values match bit for bit
+                self.values = raw['value'].astype(np.float64) * self.range * EPSILON_16 + self.min
 
-            case Compression.LINEAR_INT16 | Compression.LINEAR_FLOAT32:
-                return linear_interpolate(p0.value, p1.value, t)
+            case Compression.LINEAR_FLOAT32 | Compression.HERMITE_FLOAT32:
+                self.values = raw['value'].astype(np.float64)
+
+        match self.comprsnType:
+            case Compression.HERMITE_INT16:
+                self.inTangents = raw['inTangent'].astype(np.float64) * self.inRange * EPSILON_16 + self.inTMin
+                self.outTangents = raw['outTangent'].astype(np.float64) * self.outRange * EPSILON_16 + self.outTMin
+
+            case Compression.HERMITE_FLOAT32:
+                self.inTangents = raw['inTangent'].astype(np.float64)
+                self.outTangents = raw['outTangent'].astype(np.float64)
+
+            case _:
+                self.inTangents = np.zeros(len(raw))
+                self.outTangents = np.zeros(len(raw))
+
+
+    def Sample(self, frames: np.ndarray, scale: float = 1.0) -> np.ndarray:
+        """
+        Samples the track at every frame in one pass. A frame that falls on a key
+        belongs to the following segment, as in the per-segment loop; frames past
+        either end hold the end value.
+        """
+        times = self.times
+        values = self.values
+
+        if len(times) < 2:
+            return np.full(len(frames), values[0] * scale if len(values) else 0., dtype=float32)
+
+        frames = np.clip(np.asarray(frames, dtype=np.float64), times[0], times[-1])
+        i = np.clip(np.searchsorted(times, frames, side='right'), 1, len(times) - 1)
+        p0_time, p1_time = times[i-1], times[i]
+
+        # Hermite and linear_interpolate are plain arithmetic, so they broadcast over the arrays
+        with np.errstate(divide='ignore', invalid='ignore'):
+            match self.comprsnType:
+                case Compression.HERMITE_INT16 | Compression.HERMITE_FLOAT32:
+                    samples = Hermite(frames, values[i-1], p0_time, self.outTangents[i-1],
+                                      values[i], p1_time, self.inTangents[i])
+
+                case Compression.LINEAR_INT16 | Compression.LINEAR_FLOAT32:
+                    samples = linear_interpolate(values[i-1], values[i], (frames - p0_time) / (p1_time - p0_time))
+
+        # zero-length segments (repeated key times) take the key value
+        samples = np.where(p1_time > p0_time, samples, values[i])
+        return (samples * scale).astype(float32)
+
+
+    def BezierKeys(self, scale: float = 1.0, offset: float = 0.0):
+        """
+        The keys as Blender Bezier points: co, left and right handles, each (n, 2),
+        for values mapped to value * scale + offset. The tangents are slopes per
+        frame, so handles a third of the way along each segment reproduce the
+        Hermite segment exactly. Returns None when keys aren't strictly increasing
+        in time (a jump on one frame), which an F-curve can't hold.
+        """
+        times = self.times.astype(np.float64)
+        if len(times) < 2 or np.any(np.diff(times) <= 0):
+            return None
+
+        values = self.values * scale + offset
+        third = np.diff(times) / 3.0
+        prev = np.concatenate((third[:1], third))
+        next = np.concatenate((third, third[-1:]))
+
+        co = np.column_stack((times, values))
+        handle_left = np.column_stack((times - prev, values - self.inTangents * scale * prev))
+        handle_right = np.column_stack((times + next, values + self.outTangents * scale * next))
+        return co, handle_left, handle_right
 
 
 #=====================================================================
 #   Track groups per bone
 #=====================================================================
 class TrackGroup:
-    def __init__(self, motion: Motion, track_flags: int, bone_idx: int, f: BufferedReader):
+    def __init__(self, motion: Motion, track_flags: int, bone_idx: int, f: BinaryView, offset: int,
+                 channels: int = ALL_CHANNELS):
         self.boneIdx = bone_idx
         self.trackFlags = track_flags
         self.tracks: list[Track] = []
+        self.offset = offset
+        self.end = offset
 
         mapping = [
             (TrackFlags.TRANSLATION_X, "location", TrackType.POSITION, Axis.X),
@@ -187,13 +303,23 @@ class TrackGroup:
 
         for flag, transform, track_type, axis in mapping:
             if track_flags & flag:
-                self.tracks.append(Track((transform, track_type), trackAxis=axis, f=f))
+                # channels left out are stepped over by their header size, whatever their layout
+                if not channels & flag:
+                    self.end += TrackSize(f, self.end)
+                    continue
+
+                track = Track((transform, track_type), trackAxis=axis, f=f, offset=self.end)
+                if track.valid:
+                    self.tracks.append(track)
+                self.end = track.end
+
+        self.size = self.end - offset
 
 #=====================================================================
 #   Motion
 #=====================================================================
 class Motion:
-    f: BufferedReader
+    f: BinaryView
     size: uint32
     Id: int32
     startFrame: float
@@ -206,44 +332,136 @@ class Motion:
     ukn2: list[uint16]
     trackGroups: list[TrackGroup]
     trackTypes: list[uint16]
+    trackCount: uint32
 
 
-    def __init__(self, f: BufferedReader):
+    def __init__(self, f: BinaryView):
         self.f = f
-        self.size = ReadUInt32(f)
-        self.Id = ReadSInt32(f)
-        self.startFrame = ReadFloat(f)
-        self.endFrame = ReadFloat(f)
-        self.startFrame2 = ReadFloat(f)
-        self.endFrame2 = ReadFloat(f)
-        self.ukn = ReadUInt16(f)
-        self.ukn1 = ReadUInt16(f)
-        self.boneCount = ReadUInt16(f)
-        self.ukn2 = []
+        (self.size, self.Id,
+         self.startFrame, self.endFrame, self.startFrame2, self.endFrame2,
+         self.ukn, self.ukn1, self.boneCount) = f.read_struct(MOTION_HEADER, 0)
         self.trackGroups = []
 
-        self.trackTypes = [ ReadUInt16(f) for _ in range(self.boneCount) ]
+        offs = MOTION_HEADER.size
+        self.trackTypes = f.read_array(uint16, self.boneCount, offs).tolist()
+
+        offs += self.boneCount * 2
+        self.ukn2 = f.read_array(uint16, max(0, (self.size - offs + 1) // 2), offs).tolist()
 
-        while f.tell() < self.size:
-            self.ukn2.append( ReadUInt16(f) )
+        self.trackCount = f.read_uint32(self.size)
 
 
-    def ParseTracks(self):
+    def ParseTracks(self, bones: set[int] | None = None, channels: int = ALL_CHANNELS):
+        """
+        Walks every track group, recording its offset and size in groupSpans, but
+        decodes keys only for the given bones (None: all) and channels (TrackFlags
+        mask); other tracks are skipped by the size in their header alone. Groups
+        with nothing decoded are left out of trackGroups.
+        """
+        offs = self.size + 4
+        self.groupSpans: dict[int, tuple[int, int]] = {}
+
         for boneIdx, trackFlags in enumerate(self.trackTypes):
             
             if trackFlags:
                 # print(boneIdx)
-                self.trackGroups.append(TrackGroup(self, trackFlags, boneIdx, self.f))
+                wanted = channels if bones is None or boneIdx in bones else 0
+                track_group = TrackGroup(self, trackFlags, boneIdx, self.f, offs, wanted)
+                self.groupSpans[boneIdx] = (offs, track_group.size)
+                if track_group.tracks:
+                    self.trackGroups.append(track_group)
+                offs = track_group.end
+
+
+    def SampleTracks(self) -> tuple[int, np.ndarray, dict]:
+        """
+        Samples every track into one float32 buffer of (block, frame, axis). There is a
+        block only for each position/rotation/scale a bone has tracks for, and the
+        frames cover only the span the keys use; axes without a track stay 0.
+        Returns the first frame, the buffer and (boneIdx, TrackType) -> block.
+        """
+        blocks: dict[tuple[int, TrackType], int] = {}
+        first, last = None, None
+
+        for group in self.trackGroups:
+            for track in group.tracks:
+                blocks.setdefault((group.boneIdx, track.transformType[1]), len(blocks))
+                if len(track.times) >= 2:
+                    first = track.times[0] if first is None else min(first, track.times[0])
+                    last = track.times[-1] if last is None else max(last, track.times[-1])
+
+        first = 0 if first is None else int(first)
+        frameCount = 0 if last is None else int(last) - first + 1
+        buffer = np.zeros((len(blocks), frameCount, 3), dtype=float32)
+
+        for group in self.trackGroups:
+            for track in group.tracks:
+                times = track.times
+                if len(times) < 2:
+                    continue
+
+                frames = np.arange(times[0], times[-1] + 1)
+                scale = 0.01 if track.transformType[1] == TrackType.POSITION else 1.0  # scale position
+                block = blocks[(group.boneIdx, track.transformType[1])]
+                buffer[block, frames - first, track.trackAxis] = track.Sample(frames, scale)
+
+        return first, buffer, blocks
 
 #=====================================================================
 #   Setup parsed animations
 #=====================================================================
-def setup_animation(context: bpy.types.Context, filepath: Path, Mot: Motion) -> None:
-    scene: bpy.types.Scene = bpy.data.scenes["Scene"]
-    scene.render.fps = 60
-    scene.frame_start = int(Mot.startFrame)
-    scene.frame_end = int(Mot.endFrame)
-
+class RigBinding:
+    """
+    What the motion import needs from an armature: bone index -> bone name, the
+    inverted rest matrices and the rest quaternions. Read from the bones'
+    matrix_local (no mode switching) and packed into a custom property on the
+    armature data, reused while the rest pose hash still matches.
+    """
+    PROP = "dmc3_rig_binding"
+    BONE_NAME = re.compile(r"bone_(\d+)$")
+
+    def __init__(self, names: list[str], indices: np.ndarray, rest_inv: np.ndarray, rest_quat: np.ndarray, rest_hash: str):
+        self.names = names
+        self.rest_inv = rest_inv      # (bones, 4, 4)
+        self.rest_quat = rest_quat    # (bones, 4) w, x, y, z
+        self.rest_hash = rest_hash
+        self.slots = { int(idx): slot for slot, idx in enumerate(indices) if idx >= 0 }
+
+
+    @classmethod
+    def get(cls, armature: bpy.types.Armature) -> RigBinding:
+        bones = armature.bones
+        names = [bone.name for bone in bones]
+        mats = np.empty(len(bones) * 16, dtype=float32)
+        bones.foreach_get("matrix_local", mats)
+
+        rest_hash = hashlib.blake2b(mats.tobytes())
+        rest_hash.update("\n".join(names).encode())
+        rest_hash = rest_hash.hexdigest()
+
+        packed = armature.get(cls.PROP)
+        if packed is not None and packed.get("hash") == rest_hash:
+            count = len(names)
+            return cls(names, np.asarray(packed["indices"], dtype=np.int32),
+                       np.asarray(packed["rest_inv"], dtype=np.float64).reshape(count, 4, 4),
+                       np.asarray(packed["rest_quat"], dtype=np.float64).reshape(count, 4), rest_hash)
+
+        # foreach_get gives the matrices column-major
+        rest = mats.reshape(-1, 4, 4).transpose(0, 2, 1).astype(np.float64)
+        indices = np.array([int(m.group(1)) if (m := cls.BONE_NAME.match(name)) else -1 for name in names], dtype=np.int32)
+        binding = cls(names, indices, np.linalg.inv(rest), MatrixToQuat(rest), rest_hash)
+
+        armature[cls.PROP] = {
+            "hash": rest_hash,
+            "indices": indices.tolist(),
+            "rest_inv": binding.rest_inv.ravel().tolist(),
+            "rest_quat": binding.rest_quat.ravel().tolist(),
+        }
+        return binding
+
+
+def bind_rig(context: bpy.types.Context) -> tuple[bpy.types.Object, RigBinding]:
+    """Rig the motions go on, with its (cached) rest pose binding."""
     # Get rig (armature object)
     rig = (
         context.object if context.object.type == 'ARMATURE'
@@ -253,70 +471,120 @@ def setup_animation(context: bpy.types.Context, filepath: Path, Mot: Motion) ->
 
     # Set rotation mode for pose bones
     for bone in rig.pose.bones:
-        bone.rotation_mode = "XYZ"
+        if bone.rotation_mode != "XYZ":
+            bone.rotation_mode = "XYZ"
 
-    # Store rest matrices in edit mode
-    bpy.ops.object.mode_set(mode='EDIT')
-    rest_matrices = {bone.name: bone.matrix.copy() for bone in rig.data.edit_bones}
-    bpy.ops.object.mode_set(mode='POSE')
-    rest_quaternions = {name: mat.to_quaternion() for name, mat in rest_matrices.items()}
-    bpy.ops.object.mode_set(mode='OBJECT')
+    return rig, RigBinding.get(rig.data)
+
+
+def parse_bone_selection(text: str) -> set[int] | None:
+    """'0' or '0-3, 10-25' to a set of bone indices; empty text selects every bone (None)."""
+    bones = set()
+    for part in text.replace(';', ',').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition('-')
+        bones.update(range(int(first), int(last or first) + 1))
+
+    return bones or None
 
-    # Create new action
-    action_name = os.path.basename(filepath)
-    action = bpy.data.actions.new(action_name)
-
-    for track_group in Mot.trackGroups:
-        bone_name = f"bone_{track_group.boneIdx}"
-        bone = rig.pose.bones[bone_name]
-        rest_mat = rest_matrices[bone_name]
-        rest_quat = rest_quaternions[bone_name]
-
-        # Initialize empty track samples: [position, rotation, scale]
-        track_samples = [
-            [Vector((0., 0., 0.)) for _ in range(scene.frame_end + 1)]
-            for _ in range(3)
-        ]
 
-        for track in track_group.tracks:
-            keys = track.keys
-            for i in range(1, len(keys)):
-                start, end = keys[i - 1].timeIndex, keys[i].timeIndex
-                frame_range = end - start
+def decode_motion(filepath: Path, bones: set[int] | None = None, channels: int = ALL_CHANNELS) -> tuple[Motion, tuple]:
+    """Parses and samples a .mot file. No bpy here, so it can run on a worker thread."""
+    with open(filepath, 'rb') as file, BinaryView(file) as f:
+        motion = Motion(f)
+        motion.ParseTracks(bones, channels)
 
-                for frame in range(start, end + 1):
-                    t = (frame - start) / frame_range
-                    sample = track.SampleKeyframe(frame, i, t)
+    # the decoded key arrays are copies, they outlive the file mapping
+    return motion, motion.SampleTracks()
 
-                    if track.transformType[1] == TrackType.POSITION:
-                        sample *= 0.01  # scale position
 
-                    track_samples[track.transformType[1]][frame][track.trackAxis] = sample
+def build_action(name: str, Mot: Motion, samples: tuple, binding: RigBinding, native_keys: bool = False,
+                 location_tolerance: float = 0., rotation_tolerance: float = 0.) -> bpy.types.Action:
+    first_frame, track_samples, sample_blocks = samples
 
-        # Create FCurves for each track
-        for track in track_group.tracks:
-            transform_type, component_type = track.transformType
-            axis = track.trackAxis
-            data_path = f'pose.bones["{bone_name}"].{transform_type}'
-            fcurve = action.fcurves.new(data_path=data_path, index=axis)
-            keys = track.keys
+    # Baked curves are reduced to these errors (metres / radians); 0 keeps every frame
+    tolerances = {TrackType.POSITION: location_tolerance, TrackType.ROTATION: rotation_tolerance}
 
-            for i in range(1, len(keys)):
-                start, end = keys[i - 1].timeIndex, keys[i].timeIndex
-                for frame in range(start, end + 1):
-                    vec = track_samples[component_type][frame]
+    # Create new action
+    action = bpy.data.actions.new(name)
+
+    try:
+        for track_group in Mot.trackGroups:
+            slot = binding.slots[track_group.boneIdx]
+            bone_name = binding.names[slot]
+            rest_inv = binding.rest_inv[slot]
+            rest_quat = binding.rest_quat[slot]
+
+            rest_samples = {}
+
+            # Create FCurves for each track
+            for track in track_group.tracks:
+                transform_type, component_type = track.transformType
+                axis = track.trackAxis
+                data_path = f'pose.bones["{bone_name}"].{transform_type}'
+                fcurve = action.fcurves.new(data_path=data_path, index=axis)
+                times = track.times
+
+                if native_keys:
+                    bezier = None
+                    if component_type == TrackType.SCALE:
+                        bezier = track.BezierKeys()
+                    elif component_type == TrackType.POSITION:
+                        # only when this axis of the rest-space position depends on the same source axis alone
+                        inv_row = rest_inv[axis]
+                        if all(abs(inv_row[j]) < 1e-6 for j in range(3) if j != axis):
+                            bezier = track.BezierKeys(inv_row[axis] * 0.01, inv_row[3])
+
+                    # rotations go through the rest_quat sandwich and are always baked
+                    if bezier is not None:
+                        co, handle_left, handle_right = bezier
+                        hermite = track.comprsnType in (Compression.HERMITE_INT16, Compression.HERMITE_FLOAT32)
+                        fill_fcurve(fcurve, co[:, 0], co[:, 1], 'BEZIER' if hermite else 'LINEAR',
+                                    handle_left, handle_right)
+                        continue
+
+                if len(times) < 2:
+                    continue
 
+                # whole component converted to rest space in one batch, shared by its axes
+                if component_type not in rest_samples:
+                    vecs = track_samples[sample_blocks[(track_group.boneIdx, component_type)]]
                     if component_type == TrackType.POSITION:
-                        sample = (rest_mat.inverted() @ Matrix.Translation(vec)).to_translation()[axis]
+                        vecs = PositionsToRest(vecs, rest_inv)
                     elif component_type == TrackType.ROTATION:
-                        quat = Euler(vec).to_quaternion()
-                        sample = (rest_quat.inverted() @ quat @ rest_quat).to_euler('XYZ')[axis]
-                    elif component_type == TrackType.SCALE:
-                        sample = vec[axis]
-                    else:
-                        continue
+                        vecs = RotationsToRest(vecs, rest_quat)
+                    rest_samples[component_type] = vecs
+
+                frames = np.arange(times[0], times[-1] + 1)
+                samples = rest_samples[component_type][frames - first_frame, axis]
+
+                tolerance = tolerances.get(component_type, 0.)
+                if tolerance > 0.:
+                    # linear keys only where the per-frame curve needs them
+                    keep = DecimateKeys(samples, tolerance)
+                    fill_fcurve(fcurve, frames[keep], samples[keep], 'LINEAR')
+                else:
+                    fill_fcurve(fcurve, frames, samples)
+    except Exception:
+        # no half-built actions left behind
+        bpy.data.actions.remove(action)
+        raise
+
+    return action
+
+
+def setup_animation(context: bpy.types.Context, filepath: Path, Mot: Motion, samples: tuple,
+                    rig: bpy.types.Object, binding: RigBinding, native_keys: bool = False,
+                    location_tolerance: float = 0., rotation_tolerance: float = 0.) -> None:
+    scene: bpy.types.Scene = bpy.data.scenes["Scene"]
+    scene.render.fps = 60
+    scene.frame_start = int(Mot.startFrame)
+    scene.frame_end = int(Mot.endFrame)
 
-                    fcurve.keyframe_points.insert(frame, sample)
+    action = build_action(os.path.basename(filepath), Mot, samples, binding,
+                          native_keys, location_tolerance, rotation_tolerance)
 
     # Assign action and update timeline
     rig.animation_data_create().action = action
@@ -325,16 +593,88 @@ def setup_animation(context: bpy.types.Context, filepath: Path, Mot: Motion) ->
 #=====================================================================
 #   Import
 #=====================================================================
-def Import(context, filepath):
-    with open(filepath, 'rb') as file:
-        motion = Motion(file)
-        file.seek(motion.size, os.SEEK_SET)
+def _wanted_bones(binding: RigBinding, bones: set[int] | None) -> set[int]:
+    # only bones the rig has, narrowed to the user's selection
+    return set(binding.slots) if bones is None else set(binding.slots) & bones
+
 
-        track_count = ReadUInt32(file)
-        motion.ParseTracks()
+def Import(context, filepath, native_keys=False, location_tolerance=0., rotation_tolerance=0.,
+           bones=None, channels=ALL_CHANNELS):
+    rig, binding = bind_rig(context)
+    motion, samples = decode_motion(filepath, _wanted_bones(binding, bones), channels)
 
-        setup_animation(context, filepath, motion)
+    setup_animation(context, filepath, motion, samples, rig, binding,
+                    native_keys, location_tolerance, rotation_tolerance)
 
     return {'FINISHED'}
 
 
+def ImportBatch(context, filepaths, target='NLA', native_keys=False,
+                location_tolerance=0., rotation_tolerance=0., bones=None, channels=ALL_CHANNELS,
+                max_workers=4, report=None):
+    """
+    Imports many .mot files onto one rig. The rig is bound once, the files are
+    decoded on worker threads and each motion becomes its own action: laid one
+    after another as strips on an NLA track (target 'NLA') or kept as fake-user
+    actions (target 'LIBRARY'). A file that fails is reported (through the
+    operator's report, when given) and left out; the others are still imported.
+    """
+    filepaths = sorted(filepaths, key=lambda p: os.path.basename(p).lower())
+    if not filepaths:
+        return {'CANCELLED'}
+
+    scene: bpy.types.Scene = context.scene
+    scene.render.fps = 60
+
+    rig, binding = bind_rig(context)
+    wanted = _wanted_bones(binding, bones)
+    anim_data = rig.animation_data_create()
+    nla_track = None
+    if target == 'NLA':
+        nla_track = anim_data.nla_tracks.new()
+        nla_track.name = "DMC3 Motions"
+
+    frame = scene.frame_start
+    imported = 0
+    failed: list[str] = []
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dmc3_motions") as pool:
+        futures = [ pool.submit(decode_motion, path, wanted, channels) for path in filepaths ]
+
+        # file order kept; actions are built on the main thread as results arrive
+        for filepath, future in zip(filepaths, futures):
+            name = os.path.basename(filepath)
+            try:
+                motion, samples = future.result()
+                action = build_action(name, motion, samples, binding,
+                                      native_keys, location_tolerance, rotation_tolerance)
+            except Exception as e:
+                print(f"[DMC3 Import] Erro importando {filepath}: {e}")
+                failed.append(name)
+                continue
+
+            imported += 1
+            if nla_track is None:
+                action.use_fake_user = True
+                continue
+
+            strip = nla_track.strips.new(action.name, int(frame), action)
+            frame = math.ceil(strip.frame_end) + 1
+
+    print(f"[DMC3 Import] {imported} motions importadas")
+
+    if failed:
+        message = f"{len(failed)} of {len(filepaths)} motions failed: {', '.join(failed)}"
+        if report is not None:
+            report({'WARNING'}, message)
+        else:
+            print(f"[DMC3 Import] {message}")
+
+    if nla_track is not None:
+        if imported == 0:
+            anim_data.nla_tracks.remove(nla_track)
+        else:
+            scene.frame_end = max(scene.frame_start, int(frame) - 1)
+            frame_timeline(context)
+
+    return {'FINISHED'} if imported else {'CANCELLED'}
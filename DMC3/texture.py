@@ -0,0 +1,603 @@
+#DMC3\texture.py:
+from __future__ import annotations
+
+import os
+import re
+import sys
+import json
+import bisect
+import hashlib
+import importlib
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+# Path Hack
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# Import internal modules
+import common.cache
+from common.cache import cache_dir, cache_root
+
+importlib.reload(common.cache)
+
+INDEX_EXT = ".index"
+TEXTURE_EXTS = (".dds", ".tm2")
+
+#=====================================================================
+#   Base key
+#=====================================================================
+def extract_base_key(mod_path: Path) -> str:
+    """Retorna a chave-base para procurar texturas"""
+    name = mod_path.stem.lower()  # ex.: em028_001, plwp_guitar_002
+
+    # padrão plwp_<arma>_NNN
+    m = re.match(r'^(plwp_[a-z0-9]+)_[0-9]+$', name)
+    if m:
+        return m.group(1)  # plwp_guitar, plwp_sword2 etc.
+
+    # padrão geral xxNNN_MMM
+    m = re.match(r'^([a-z]{2}\d{3})_[0-9]+$', name)
+    if m:
+        return m.group(1)  # em028, pl015, st209 etc.
+
+    # fallback: retorna tudo antes do último underline
+    if '_' in name:
+        return name.rsplit('_', 1)[0]
+    return name
+
+
+#=====================================================================
+#   Persistent index of a directory tree
+#=====================================================================
+class TextureIndex:
+    """
+    Everything texture discovery needs to know about one directory tree:
+    the lines of every .index file, which folder entries expand to which
+    sub-indexes and where each texture name resolved to. Saved to the add-on
+    cache and rebuilt only when a directory or .index file mtime changes.
+    """
+    VERSION = 1
+
+    root: Path
+    recursive: bool
+    dirs: dict[str, int]            # relative dir -> mtime_ns
+    indexes: dict[str, dict]        # relative .index path -> {"mtime", "lines"}
+    entries: dict[str, list[str]]   # index line (mod/texture name) -> relative .index paths
+    folders: dict[str, list[str]]   # folder entry -> relative sub-index paths
+    textures: dict[str, str | None] # texture simple name -> relative path (None = not found)
+
+    def __init__(self, root: Path, recursive: bool = True):
+        self.root = root
+        self.recursive = recursive
+        self.dirs = {}
+        self.indexes = {}
+        self.entries = {}
+        self.folders = {}
+        self.textures = {}
+        self.dirty = False
+
+
+    @property
+    def cache_path(self) -> Path:
+        key = f"{os.path.abspath(self.root)}|{int(self.recursive)}"
+        return cache_dir("texture_index") / (hashlib.sha1(key.encode("utf-8")).hexdigest() + ".json")
+
+    @classmethod
+    def load(cls, root: Path, recursive: bool = True) -> TextureIndex:
+        """Returns the cached index for root, rebuilding it if the tree changed."""
+        index = cls(root, recursive)
+
+        try:
+            data = json.loads( index.cache_path.read_text(encoding="utf-8") )
+            if data.get("version") == cls.VERSION:
+                index.dirs = data["dirs"]
+                index.indexes = data["indexes"]
+                index.folders = data["folders"]
+                index.textures = data["textures"]
+        except Exception:
+            pass
+
+        if not index.dirs or not index.is_valid():
+            index.build()
+        else:
+            index._map_entries()
+
+        return index
+
+    def save(self) -> None:
+        if not self.dirty:
+            return
+
+        data = {
+            "version": self.VERSION,
+            "root": str(self.root),
+            "recursive": self.recursive,
+            "dirs": self.dirs,
+            "indexes": self.indexes,
+            "folders": self.folders,
+            "textures": self.textures,
+        }
+
+        try:
+            self.cache_path.write_text( json.dumps(data), encoding="utf-8" )
+            self.dirty = False
+        except Exception as e:
+            print(f"[DMC3 Import] Não foi possível salvar o cache de índices: {e}")
+
+
+    def is_valid(self) -> bool:
+        try:
+            for rel, mtime in self.dirs.items():
+                if os.stat( os.path.join(self.root, rel) ).st_mtime_ns != mtime:
+                    return False
+
+            for rel, info in self.indexes.items():
+                if os.stat( os.path.join(self.root, rel) ).st_mtime_ns != info["mtime"]:
+                    return False
+        except OSError:
+            return False
+
+        return True
+
+    def build(self) -> None:
+        self.dirs = {}
+        self.indexes = {}
+        self.folders = {}
+        self.textures = {}
+
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            rel_dir = os.path.relpath(dirpath, self.root)
+
+            try:
+                self.dirs[rel_dir] = os.stat(dirpath).st_mtime_ns
+            except OSError:
+                continue
+
+            # nomes com backslashes literais (extrator original no Windows) também terminam em .index
+            for name in filenames:
+                if not name.endswith(INDEX_EXT):
+                    continue
+
+                path = os.path.join(dirpath, name)
+                try:
+                    mtime = os.stat(path).st_mtime_ns
+                    lines = Path(path).read_text(encoding='utf-8', errors='ignore').splitlines()
+                except Exception:
+                    continue
+
+                self.indexes[os.path.normpath( os.path.join(rel_dir, name) )] = { "mtime": mtime, "lines": lines }
+
+            if not self.recursive:
+                dirnames.clear()
+
+        self._map_entries()
+        self.dirty = True
+
+    def _map_entries(self) -> None:
+        self.entries = {}
+
+        for rel, info in self.indexes.items():
+            for line in info["lines"]:
+                self.entries.setdefault(line, []).append(rel)
+
+
+    # Lookups
+    def index_lines(self, rel: str) -> list[str]:
+        return self.indexes[rel]["lines"]
+
+    def indexes_listing(self, line: str) -> list[Path]:
+        """.index files that have line as one of their entries."""
+        return [ self.root / rel for rel in self.entries.get(line, ()) ]
+
+    def sub_indexes(self, folder_name: str) -> list[str]:
+        """Equivalent of root.rglob(f"*{folder_name}*.index")."""
+        found = self.folders.get(folder_name)
+
+        if found is None:
+            found = [ rel for rel in self.indexes
+                      if folder_name in os.path.basename(rel)[:-len(INDEX_EXT)] ]
+            self.folders[folder_name] = found
+            self.dirty = True
+
+        return found
+
+
+#=====================================================================
+#   File names of a directory tree
+#=====================================================================
+class FileNameMap:
+    """
+    Every file name under root from a single directory scan. The names are
+    kept in one NUL-separated string, so a substring lookup is a single
+    str.find and still returns the first match in rglob order. This covers
+    both plain names and the extractor's "folder\\name.dds" file names.
+    """
+    root: Path
+    paths: list[str]
+    starts: list[int]
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.paths = []
+        self.starts = []
+        self._found: dict[str, Path | None] = {}
+        names = []
+        offs = 0
+
+        for dirpath, dirnames, filenames in os.walk(root):
+            for name in filenames:
+                self.paths.append( os.path.join(dirpath, name) )
+                self.starts.append(offs)
+                names.append(name)
+                offs += len(name) + 1
+
+        self._names = "\0".join(names)
+
+
+    def find(self, simple_name: str) -> Path | None:
+        if simple_name in self._found:
+            return self._found[simple_name]
+
+        found = None
+        pos = self._names.find(simple_name) if simple_name else -1
+
+        if pos != -1:
+            found = Path( self.paths[bisect.bisect_right(self.starts, pos) - 1] )
+
+        self._found[simple_name] = found
+        return found
+
+
+#=====================================================================
+#   Texture lookup for one import
+#=====================================================================
+class TextureLookup:
+    """
+    Texture discovery for one import. Each TextureIndex is loaded (and
+    validated against the file system) at most once per lookup.
+    """
+    def __init__(self):
+        self._indexes: dict[tuple[str, bool], TextureIndex] = {}
+        self._file_maps: dict[str, FileNameMap] = {}
+
+
+    def index(self, root: Path, recursive: bool = True) -> TextureIndex:
+        key = (str(root), recursive)
+        index = self._indexes.get(key)
+
+        if index is None:
+            index = self._indexes[key] = TextureIndex.load(root, recursive)
+
+        return index
+
+    def file_map(self, root: Path) -> FileNameMap:
+        """Single scan of root, shared by every texture lookup under it."""
+        file_map = self._file_maps.get(str(root))
+
+        if file_map is None:
+            file_map = self._file_maps[str(root)] = FileNameMap(root)
+
+        return file_map
+
+    def save(self) -> None:
+        for index in self._indexes.values():
+            index.save()
+
+
+    def find_index_for_mod(self, mod_path: Path, max_ancestors=6) -> Path | None:
+        """
+        Procura um arquivo .index que contenha o nome do mod.
+        Vai subindo até max_ancestors níveis e também procura recursivamente.
+        Trata também nomes criados pelo extractor que contêm backslashes literal.
+        """
+        mod_simple = mod_path.name.split("\\")[-1]  # lida com nomes que já têm '\' dentro
+        search_dirs = [mod_path.parent] + list(mod_path.parent.parents)[:max_ancestors]
+
+        for anc in search_dirs:
+            found = self.index(anc, recursive=False).indexes_listing(mod_simple)
+            if found:
+                return found[0]
+
+        # busca recursiva no diretório do mod
+        found = self.index(mod_path.parent).indexes_listing(mod_simple)
+        return found[0] if found else None
+
+    def find_file_by_simple_name(self, simple_name: str, root: Path) -> Path | None:
+        """
+        Procura por qualquer ficheiro cujo nome contenha "simple_name" sob 'root'.
+        (isso também cobre os arquivos gerados com backslashes como parte do nome).
+        Retorna Path ou None.
+        """
+        index = self.index(root)
+
+        if simple_name in index.textures:
+            rel = index.textures[simple_name]
+            return None if rel is None else root / rel
+
+        found = self.file_map(root).find(simple_name)
+        index.textures[simple_name] = None if found is None else os.path.relpath(found, root)
+        index.dirty = True
+        return found
+
+    def collect_textures_from_index(self, index_path: Path) -> list[Path]:
+        """
+        Lê o index e constrói uma lista ordenada de arquivos de textura (Paths).
+        Expande entries do tipo 'folder' (PTX) lendo sub-indexes.
+        """
+        base_dir = index_path.parent
+        base_index = self.index(base_dir)
+        rel = os.path.normpath( os.path.relpath(index_path, base_dir) )
+
+        if rel in base_index.indexes:
+            lines = base_index.index_lines(rel)
+        else:
+            try:
+                lines = index_path.read_text(encoding='utf-8', errors='ignore').splitlines()
+            except Exception:
+                return []
+
+        textures = []
+        for line in lines:
+            if not line or line == "PNST":
+                continue
+            parts = line.split()
+            name = parts[0]
+            # entrada direta .dds/.tm2 no index
+            if name.lower().endswith(TEXTURE_EXTS):
+                f = self.find_file_by_simple_name(name, base_dir)
+                if f:
+                    textures.append(f)
+                continue
+            # folder / ptx / ipum -> expand procurando um sub-index
+            if len(parts) > 1 and parts[-1] in ("folder", "vid") or "folder" in line.lower():
+                folder_name = name
+                # procura sub-indexes que mencionem esse folder_name
+                for sub_idx in base_index.sub_indexes(folder_name):
+                    for sline in base_index.index_lines(sub_idx):
+                        sline = sline.strip()
+                        if not sline:
+                            continue
+                        if sline.lower().endswith(TEXTURE_EXTS):
+                            f = self.find_file_by_simple_name(sline, base_dir)
+                            if f:
+                                textures.append(f)
+        # deduplicate while preserving order
+        seen = set(); unique = []
+        for t in textures:
+            s = str(t)
+            if s not in seen:
+                seen.add(s); unique.append(t)
+        return unique
+
+
+#=====================================================================
+#   TM2 -> DDS
+#=====================================================================
+DDS_MAGIC = b"DDS "
+TM2_HEADER_SIZE = 112  # header provável quando não há assinatura
+COPY_CHUNK = 1 << 20
+
+def _dds_cache_record(tm2_path: Path) -> Path:
+    key = os.path.abspath(tm2_path).encode("utf-8")
+    return cache_dir("dds", "sources") / (hashlib.sha1(key).hexdigest() + ".json")
+
+def _find_dds_payload(src) -> int:
+    """Offset of the first 'DDS ' signature, scanning in chunks (-1 if absent)."""
+    offs = 0
+    tail = b""
+
+    while True:
+        chunk = src.read(COPY_CHUNK)
+        if not chunk:
+            return -1
+
+        data = tail + chunk
+        idx = data.find(DDS_MAGIC)
+        if idx != -1:
+            return offs - len(tail) + idx
+
+        tail = data[-(len(DDS_MAGIC) - 1):]
+        offs += len(chunk)
+
+def convert_tm2_to_dds(tm2_path: Path) -> Path | None:
+    """
+    Conversão simples TM2→DDS: procura assinatura 'DDS ' no arquivo TM2 e grava a partir daí.
+    Se não encontrar, recorta um header provável (112 bytes).
+
+    The payload is streamed into the add-on cache under its content hash, so
+    read-only dumps work and identical payloads are stored once. Nothing is
+    rewritten while the converted file is newer than the .tm2.
+    Retorna Path para .dds ou None.
+    """
+    tmp_out = None
+
+    try:
+        src_stat = tm2_path.stat()
+
+        # conversões antigas gravadas ao lado do .tm2
+        sibling = tm2_path.with_suffix(".dds")
+        if sibling.exists() and sibling.stat().st_mtime_ns >= src_stat.st_mtime_ns:
+            return sibling
+
+        record_path = _dds_cache_record(tm2_path)
+        try:
+            record = json.loads( record_path.read_text(encoding="utf-8") )
+            dds_out = Path(record["output"])
+            if (record["size"] == src_stat.st_size and record["mtime"] == src_stat.st_mtime_ns
+                    and dds_out.exists() and dds_out.stat().st_mtime_ns >= src_stat.st_mtime_ns):
+                return dds_out
+        except Exception:
+            pass
+
+        out_dir = cache_dir("dds")
+        tmp_out = out_dir / f"{os.getpid()}_{hashlib.sha1(str(tm2_path).encode('utf-8')).hexdigest()}.tmp"
+        digest = hashlib.blake2b(digest_size=16)
+
+        with open(tm2_path, "rb") as src, open(tmp_out, "wb") as dst:
+            idx = _find_dds_payload(src)
+            src.seek(TM2_HEADER_SIZE if idx == -1 else idx)
+
+            while chunk := src.read(COPY_CHUNK):
+                digest.update(chunk)
+                dst.write(chunk)
+
+        dds_out = out_dir / (digest.hexdigest() + ".dds")
+        if dds_out.exists():
+            tmp_out.unlink()
+            os.utime(dds_out)  # mark as fresh for the newer-than-input check
+        else:
+            os.replace(tmp_out, dds_out)
+
+        record_path.write_text( json.dumps({
+            "size": src_stat.st_size,
+            "mtime": src_stat.st_mtime_ns,
+            "output": str(dds_out),
+        }), encoding="utf-8" )
+
+        return dds_out
+    except Exception as e:
+        print(f"[TM2->DDS] Falha em {tm2_path}: {e}")
+        if tmp_out is not None:
+            tmp_out.unlink(missing_ok=True)
+        return None
+
+
+#=====================================================================
+#   Background prefetch
+#=====================================================================
+DDS_HEADER_SIZE = 128  # magic + DDS_HEADER
+
+def file_hash(path: Path) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+
+    with open(path, "rb") as f:
+        while chunk := f.read(COPY_CHUNK):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+class ContentIndex:
+    """
+    Session-wide texture identity. The key is the full content hash, so
+    byte-identical files (the same effect texture copied into every em###
+    folder, say) share one image datablock, and a key saved in a .blend can
+    never match a different file later. Each file is hashed once per session
+    (per size and mtime). Thread-safe, prefetch workers call key() concurrently.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (real path, size, mtime) -> key
+        self._keys: dict[tuple, str] = {}
+
+
+    def key(self, path: Path) -> str:
+        st = os.stat(path)
+        signature = (os.path.realpath(path), st.st_size, st.st_mtime_ns)
+
+        with self._lock:
+            key = self._keys.get(signature)
+        if key is not None:
+            return key
+
+        key = file_hash(path)
+        with self._lock:
+            self._keys[signature] = key
+
+        return key
+
+
+content_index = ContentIndex()
+
+
+def prepare_texture(tex_path: Path) -> tuple[Path, str]:
+    """
+    Converts TM2 when needed and checks the DDS header. Returns the file to
+    load and its registry key (content based, see ContentIndex). A bad header
+    is only reported; images.load still gets to decide.
+    """
+    load_path = tex_path
+
+    if tex_path.suffix.lower() == ".tm2":
+        print(f"[DMC3 Import] Convertendo TM2 para DDS: {tex_path}")
+        load_path = convert_tm2_to_dds(tex_path) or tex_path
+
+    try:
+        if load_path.suffix.lower() == ".dds":
+            with open(load_path, "rb") as f:
+                header = f.read(DDS_HEADER_SIZE)
+
+            if len(header) < DDS_HEADER_SIZE or header[:4] != DDS_MAGIC:
+                print(f"[DMC3 Import] Aviso: cabeçalho DDS inválido: {load_path}")
+
+        key = content_index.key(load_path)
+    except OSError as e:
+        # unreadable here; keyed by path and left for images.load to report
+        print(f"[DMC3 Import] Erro lendo textura {load_path}: {e}")
+        key = f"path:{os.path.realpath(load_path)}"
+
+    return load_path, key
+
+
+class TexturePrefetch:
+    """
+    Resolves, converts and validates a model's textures on worker threads,
+    started before the model is parsed. Nothing here touches bpy; only the
+    final images.load stays on the main thread.
+    """
+    def __init__(self, mod_path: Path, max_workers: int = 4):
+        self.mod_path = mod_path
+        self.base_key = extract_base_key(mod_path)
+        self.lookup = TextureLookup()
+        self._prepared: dict[str, Future] = {}
+
+        cache_root()  # resolve the user folder here (bpy.utils is main-thread only); workers reuse it
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dmc3_textures")
+        self._resolved = self._pool.submit(self._resolve)
+
+
+    def _resolve(self) -> tuple[Path | None, list[Path]]:
+        lookup = self.lookup
+        base_key = self.base_key
+        mod_path = self.mod_path
+
+        # localiza index do pac (ex.: em028.index) que descreve este mod
+        index_path = lookup.find_index_for_mod(mod_path)
+        textures = []
+
+        if index_path:
+            all_textures = lookup.collect_textures_from_index(index_path)
+            # filtrar apenas as texturas que contêm a base_key
+            textures = [t for t in all_textures if base_key in t.stem.lower()]
+            print(f"[DMC3 Import] Encontradas {len(textures)} texturas para base_key '{base_key}'")
+        else:
+            # tentativas adicionais: procurar qualquer .index no parent
+            print(f"[DMC3 Import] Procurando por arquivos .index no diretório...")
+            for cand in lookup.index(mod_path.parent, recursive=False).indexes:
+                cand = mod_path.parent / cand
+                all_textures = lookup.collect_textures_from_index(cand)
+                filtered_textures = [t for t in all_textures if base_key in t.stem.lower()]
+                if filtered_textures:
+                    textures = filtered_textures
+                    index_path = cand
+                    print(f"[DMC3 Import] Encontradas {len(textures)} texturas no índice {cand.name}")
+                    break
+
+        for tex in textures:
+            self._prepared[str(tex)] = self._pool.submit(prepare_texture, tex)
+
+        return index_path, textures
+
+    def result(self) -> tuple[Path | None, list[Path]]:
+        """(index_path, textures) once resolution has finished."""
+        return self._resolved.result()
+
+    def prepared(self, tex_path: Path) -> tuple[Path, str]:
+        """(file to load, registry key) for tex_path."""
+        self.result()
+        future = self._prepared.get(str(tex_path))
+        return prepare_texture(tex_path) if future is None else future.result()
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        self.lookup.save()
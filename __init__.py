@@ -18,9 +18,9 @@ from pathlib import Path
 import importlib
 import traceback
 import bpy
-from bpy.types import Operator
+from bpy.types import Operator, OperatorFileListElement
 from bpy_extras.io_utils import ImportHelper
-from bpy.props import StringProperty
+from bpy.props import StringProperty, BoolProperty, FloatProperty, CollectionProperty, EnumProperty
 
 # try relative imports (works when installed as add-on) and fallback to top-level (dev)
 try:
@@ -43,15 +43,104 @@ class DMC3_OT_import(Operator, ImportHelper):
     filename_ext = ".mod"
     filter_glob: StringProperty(default="*.mod;*.scm;*.mot", options={'HIDDEN'})
 
+    # multi-selection / directory, used for batch .mot imports
+    files: CollectionProperty(type=OperatorFileListElement, options={'HIDDEN', 'SKIP_SAVE'})
+    directory: StringProperty(subtype='DIR_PATH', options={'HIDDEN', 'SKIP_SAVE'})
+
+    calc_tangents: BoolProperty(
+        name="Calculate Tangents",
+        description="Compute MikkTSpace tangents for the UV map of every imported mesh",
+        default=False,
+    )
+
+    native_keys: BoolProperty(
+        name="Native Keys",
+        description="Write the motion's Hermite keys as Bezier keys instead of baking every frame "
+                    "(rotations are still baked)",
+        default=False,
+    )
+
+    location_tolerance: FloatProperty(
+        name="Location Tolerance",
+        description="Drop baked location keys that linear interpolation reproduces within this distance (0 keeps every frame)",
+        default=0.0, min=0.0, unit='LENGTH',
+    )
+
+    rotation_tolerance: FloatProperty(
+        name="Rotation Tolerance",
+        description="Drop baked rotation keys that linear interpolation reproduces within this angle (0 keeps every frame)",
+        default=0.0, min=0.0, subtype='ANGLE',
+    )
+
+    motion_bones: StringProperty(
+        name="Bones",
+        description="Bone indices to import motion for, e.g. '0' for root motion only or '0-3, 10-25'. "
+                    "Empty imports every bone the rig has",
+        default="",
+    )
+
+    motion_channels: EnumProperty(
+        name="Channels",
+        description="Motion channels to decode and import",
+        items=(
+            ('LOCATION', "Location", ""),
+            ('ROTATION', "Rotation", ""),
+            ('SCALE', "Scale", ""),
+        ),
+        options={'ENUM_FLAG'},
+        default={'LOCATION', 'ROTATION', 'SCALE'},
+    )
+
+    motion_target: EnumProperty(
+        name="Batch Motions",
+        description="Where the actions go when several .mot files (or a folder) are imported at once",
+        items=(
+            ('NLA', "NLA Strips", "Lay the motions one after another on an NLA track of the rig"),
+            ('LIBRARY', "Action Library", "Keep the motions as fake-user actions"),
+        ),
+        default='NLA',
+    )
+
+    def motion_paths(self) -> list[Path]:
+        directory = Path(self.directory or Path(self.filepath).parent)
+        names = [f.name for f in self.files if f.name.lower().endswith('.mot')]
+        if names:
+            return [directory / name for name in names]
+
+        # nothing picked: the whole folder
+        if not Path(self.filepath).suffix and directory.is_dir():
+            return sorted(directory.glob("*.mot"))
+
+        return []
+
+    def motion_options(self) -> dict:
+        channels = 0
+        for name in self.motion_channels:
+            channels |= motion.CHANNEL_FLAGS[name]
+
+        return dict(
+            native_keys=self.native_keys,
+            location_tolerance=self.location_tolerance,
+            rotation_tolerance=self.rotation_tolerance,
+            bones=motion.parse_bone_selection(self.motion_bones),
+            channels=channels,
+        )
+
     def execute(self, context):
         fp = Path(self.filepath)
         ext = fp.suffix.lower()
         try:
             if ext in ('.mod', '.scm'):
                 # model.Import expects a pathlib.Path in this addon
-                return model.Import(context, fp)
+                return model.Import(context, fp, calc_tangents=self.calc_tangents)
+            elif ext in ('.mot', '') and (len(mot_paths := self.motion_paths()) > 1 or ext == ''):
+                if not mot_paths:
+                    self.report({'WARNING'}, "No .mot files selected")
+                    return {'CANCELLED'}
+                return motion.ImportBatch(context, mot_paths, target=self.motion_target,
+                                          report=self.report, **self.motion_options())
             elif ext == '.mot':
-                return motion.Import(context, fp)
+                return motion.Import(context, fp, **self.motion_options())
             else:
                 self.report({'WARNING'}, f"No importer for extension: {ext}")
                 return {'CANCELLED'}
@@ -0,0 +1,152 @@
+#common\animutils.py:
+from __future__ import annotations
+
+import numpy as np
+
+# Batched versions of the mathutils rotation conversions used by the motion import.
+# Quaternions are (..., 4) arrays in w, x, y, z order, eulers (..., 3) arrays in XYZ order;
+# the formulas follow Blender's math_rotation.c so results match Euler/Quaternion.
+
+FLT_EPSILON = 1.1920928955078125e-07
+
+#=====================================================================
+#   Quaternions
+#=====================================================================
+def EulerToQuat(eul: np.ndarray) -> np.ndarray:
+    half = np.asarray(eul, dtype=np.float64) * 0.5
+    ci, cj, ch = np.moveaxis(np.cos(half), -1, 0)
+    si, sj, sh = np.moveaxis(np.sin(half), -1, 0)
+    cc = ci * ch
+    cs = ci * sh
+    sc = si * ch
+    ss = si * sh
+
+    return np.stack((
+        cj * cc + sj * ss,
+        cj * sc - sj * cs,
+        cj * ss + sj * cc,
+        cj * cs - sj * sc,
+    ), axis=-1)
+
+def QuatMul(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    a0, a1, a2, a3 = np.moveaxis(np.asarray(a, dtype=np.float64), -1, 0)
+    b0, b1, b2, b3 = np.moveaxis(np.asarray(b, dtype=np.float64), -1, 0)
+
+    return np.stack((
+        a0 * b0 - a1 * b1 - a2 * b2 - a3 * b3,
+        a0 * b1 + a1 * b0 + a2 * b3 - a3 * b2,
+        a0 * b2 + a2 * b0 + a3 * b1 - a1 * b3,
+        a0 * b3 + a3 * b0 + a1 * b2 - a2 * b1,
+    ), axis=-1)
+
+def QuatInverted(q: np.ndarray) -> np.ndarray:
+    q = np.asarray(q, dtype=np.float64)
+    return q * np.array([1., -1., -1., -1.]) / np.sum(q * q, axis=-1, keepdims=True)
+
+def MatrixToQuat(mats: np.ndarray) -> np.ndarray:
+    """(..., 4, 4) or (..., 3, 3) row-major matrices to unit quaternions, scale removed."""
+    m = np.asarray(mats, dtype=np.float64)[..., :3, :3]
+    m = m / np.linalg.norm(m, axis=-2, keepdims=True)
+
+    # same four branches as mat3_normalized_to_quat, picking the largest diagonal term
+    m00, m11, m22 = m[..., 0, 0], m[..., 1, 1], m[..., 2, 2]
+    traces = np.stack((
+        1. + m00 + m11 + m22,
+        1. + m00 - m11 - m22,
+        1. - m00 + m11 - m22,
+        1. - m00 - m11 + m22,
+    ), axis=-1)
+    branch = np.argmax(traces, axis=-1)
+    t = np.take_along_axis(traces, branch[..., None], axis=-1)[..., 0]
+
+    # each branch's (w, x, y, z), all scaled by 4 * its largest component
+    yz, zy = m[..., 1, 2], m[..., 2, 1]
+    zx, xz = m[..., 2, 0], m[..., 0, 2]
+    xy, yx = m[..., 0, 1], m[..., 1, 0]
+    candidates = np.stack((
+        np.stack((t, zy - yz, xz - zx, yx - xy), axis=-1),
+        np.stack((zy - yz, t, xy + yx, xz + zx), axis=-1),
+        np.stack((xz - zx, xy + yx, t, yz + zy), axis=-1),
+        np.stack((yx - xy, xz + zx, yz + zy, t), axis=-1),
+    ), axis=-2)
+    q = np.take_along_axis(candidates, branch[..., None, None], axis=-2)[..., 0, :]
+    return q / np.linalg.norm(q, axis=-1, keepdims=True)
+
+def QuatToEuler(q: np.ndarray) -> np.ndarray:
+    """Quaternion.to_euler('XYZ'): of the two euler solutions, the one with the smaller angles."""
+    q = np.asarray(q, dtype=np.float64)
+    q = q / np.linalg.norm(q, axis=-1, keepdims=True)
+    q0, q1, q2, q3 = np.moveaxis(q * np.sqrt(2.), -1, 0)
+
+    # quat_to_mat3, only the terms the XYZ decomposition reads (mat[col][row])
+    m00 = 1. - q2 * q2 - q3 * q3
+    m01 = q0 * q3 + q1 * q2
+    m02 = -q0 * q2 + q1 * q3
+    m11 = 1. - q1 * q1 - q3 * q3
+    m12 = q0 * q1 + q2 * q3
+    m21 = -q0 * q1 + q2 * q3
+    m22 = 1. - q1 * q1 - q2 * q2
+
+    cy = np.hypot(m00, m01)
+    regular = cy > 16. * FLT_EPSILON
+
+    eul1 = np.stack((
+        np.where(regular, np.arctan2(m12, m22), np.arctan2(-m21, m11)),
+        np.arctan2(-m02, cy),
+        np.where(regular, np.arctan2(m01, m00), 0.),
+    ), axis=-1)
+    eul2 = np.where(regular[..., None], np.stack((
+        np.arctan2(-m12, -m22),
+        np.arctan2(-m02, -cy),
+        np.arctan2(-m01, -m00),
+    ), axis=-1), eul1)
+
+    use2 = np.abs(eul1).sum(axis=-1) > np.abs(eul2).sum(axis=-1)
+    return np.where(use2[..., None], eul2, eul1)
+
+#=====================================================================
+#   Rest-space conversion
+#=====================================================================
+def PositionsToRest(positions: np.ndarray, rest_inv: np.ndarray) -> np.ndarray:
+    """(frames, 3) positions through a bone's inverted 4x4 rest matrix."""
+    return positions @ rest_inv[:3, :3].T + rest_inv[:3, 3]
+
+def RotationsToRest(eulers: np.ndarray, rest_quat: np.ndarray) -> np.ndarray:
+    """(frames, 3) XYZ eulers to rest_quat^-1 @ q @ rest_quat, back as XYZ eulers."""
+    quats = QuatMul(QuatMul(QuatInverted(rest_quat), EulerToQuat(eulers)), rest_quat)
+    return QuatToEuler(quats)
+
+#=====================================================================
+#   Keyframe reduction
+#=====================================================================
+def DecimateKeys(values: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Indices of the per-frame samples to keep so that linear interpolation between
+    them stays within tolerance of every sample. Douglas-Peucker, with every
+    segment over the tolerance split at its worst sample in the same pass.
+    """
+    count = len(values)
+    if count <= 2 or tolerance <= 0.:
+        return np.arange(count)
+
+    values = np.asarray(values, dtype=np.float64)
+    frames = np.arange(count)
+    keep = np.zeros(count, dtype=bool)
+    keep[[0, -1]] = True
+
+    while True:
+        idx = np.flatnonzero(keep)
+        seg = np.minimum(np.searchsorted(idx, frames, side='right') - 1, len(idx) - 2)
+        start, end = idx[seg], idx[seg + 1]
+
+        lerp = values[start] + (values[end] - values[start]) * ((frames - start) / (end - start))
+        error = np.abs(lerp - values)
+
+        seg_max = np.maximum.reduceat(error, idx[:-1])
+        split = np.flatnonzero((error == seg_max[seg]) & (error > tolerance))
+        if len(split) == 0:
+            return idx
+
+        # first worst sample of each segment
+        _, first = np.unique(seg[split], return_index=True)
+        keep[split[first]] = True
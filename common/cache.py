@@ -0,0 +1,28 @@
+#common\cache.py:
+import tempfile
+from pathlib import Path
+
+import bpy
+
+CACHE_NAME = "dmc3_import"
+
+# resolved once; bpy.utils is main-thread only, so the first call must come from it
+_base: Path | None = None
+
+def cache_root() -> Path:
+    """The add-on's cache folder, looked up through bpy.utils on the first call only."""
+    global _base
+    if _base is None:
+        try:
+            _base = Path( bpy.utils.user_resource('DATAFILES', path=CACHE_NAME, create=True) )
+        except Exception:
+            # background/factory-startup sessions may have no user folder
+            _base = Path(tempfile.gettempdir()) / CACHE_NAME
+
+    return _base
+
+def cache_dir(*parts: str) -> Path:
+    """Returns (and creates) a persistent cache folder for the add-on."""
+    path = cache_root().joinpath(*parts)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
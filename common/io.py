@@ -1,7 +1,11 @@
 #common\io.py:
+from __future__ import annotations
+
 import enum
+import io
+import mmap
 from io import BufferedReader, BufferedWriter
-from struct import pack, unpack
+from struct import Struct, pack, unpack
 from typing import NewType, TypeVar
 
 from mathutils import *
@@ -15,6 +19,7 @@ int64 = np.int64
 uint16 = np.uint16
 uint32 = np.uint32
 uint64 = np.uint64
+float32 = np.float32
 
 offs_t = NewType('offs_t', int)
 
@@ -110,44 +115,212 @@ def ReadCString(f: BufferedReader) -> bytes:
 
 # Byte
 def ReadUByte(f: BufferedReader, endian = Endian.LITTLE) -> ubyte:   
-    # return unpack( endian + 'B', f.read(1) )[0]
-    return unpack( 'B', f.read(1) )[0]
+    return _Read(f, Endian.LITTLE, 'B')
 
 def ReadByte(f: BufferedReader, endian = Endian.LITTLE) -> byte:  #signed
-    # return unpack( endian + 'b', f.read(1) )[0]
-    return unpack( 'b', f.read(1) )[0]
+    return _Read(f, Endian.LITTLE, 'b')
 
 
 # Short
 def ReadUInt16(f: BufferedReader, endian = Endian.LITTLE) -> uint16:
-    return unpack( str(endian) + 'H', f.read(2) )[0]
+    return _Read(f, endian, 'H')
 
 def ReadSInt16(f: BufferedReader, endian = Endian.LITTLE) -> int16: #signed
-    return unpack( str(endian) + 'h', f.read(2) )[0]
+    return _Read(f, endian, 'h')
 
 
 # Int
 def ReadUInt32(f: BufferedReader, endian = Endian.LITTLE) -> uint32:
-    return unpack( str(endian) + 'L', f.read(4) )[0]
+    return _Read(f, endian, 'L')
     
 def ReadSInt32(f: BufferedReader, endian = Endian.LITTLE) -> int32:  #signed
-    return unpack( str(endian) + 'l', f.read(4) )[0]
+    return _Read(f, endian, 'l')
 
 
 # Int64
 def ReadUInt64(f: BufferedReader, endian = Endian.LITTLE) -> uint64:  
-    return unpack( str(endian) + 'Q', f.read(8) )[0]
+    return _Read(f, endian, 'Q')
 
 def ReadSInt64(f: BufferedReader, endian = Endian.LITTLE) -> int64:  #signed
-    return unpack( str(endian) + 'q', f.read(8) )[0]
+    return _Read(f, endian, 'q')
 
 
 # Float
 def ReadFloat(f: BufferedReader, endian = Endian.LITTLE) -> float: 
-    return unpack( str(endian) + 'f', f.read(4) )[0]
+    return _Read(f, endian, 'f')
+
+
+# Precompiled scalar formats, so the Read* wrappers never rebuild a format string
+_STRUCTS: dict[str, dict[str, Struct]] = {
+    endian: { code: Struct(endian + code) for code in 'bBhHlLqQf' }
+    for endian in (Endian.LITTLE, Endian.BIG)
+}
+
+def _Read(f, endian: str, code: str):
+    st = _STRUCTS[str(endian)][code]
+
+    if isinstance(f, BinaryView):
+        return f.read_struct(st)[0]
+
+    return st.unpack(f.read(st.size))[0]
 
 #endregion
 
+#=====================================================================
+#   Memory-mapped reader
+#=====================================================================
+class BinaryView:
+    """
+    Zero-copy reader over a memory-mapped file.
+
+    Every read_* method takes an optional absolute offset. With an offset the
+    read is seek-free and leaves the cursor alone; without one it reads at the
+    cursor and advances it, so the view can also stand in for a file object
+    (seek/tell/read) wherever the old Read* functions are still used.
+    """
+    endian: str
+    pos: int
+
+    def __init__(self, f: BufferedReader, endian = Endian.LITTLE):
+        self.endian = str(endian)
+        self.pos = 0
+
+        try:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError, io.UnsupportedOperation):
+            # empty files and in-memory streams can't be mapped
+            f.seek(0)
+            self._data = f.read()
+
+        self.buffer = memoryview(self._data)
+        self._structs: dict[str, Struct] = {}
+
+
+    def __enter__(self) -> BinaryView:
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        try:
+            self.close()
+        except BufferError:
+            # an exception in flight may hold views through its traceback;
+            # don't mask it, the mapping goes away with the arrays
+            if exc_type is None:
+                raise
+
+    def __len__(self) -> int:
+        return len(self.buffer)
+
+    def close(self) -> None:
+        """
+        Unmaps the file. Raises BufferError while arrays returned by
+        read_array still reference the mapping (copy or drop them first).
+        """
+        self.buffer.release()
+
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+
+
+    # Cursor (file-like)
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self.pos
+        elif whence == io.SEEK_END:
+            offset += len(self.buffer)
+
+        self.pos = offset
+        return self.pos
+
+    def tell(self) -> int:
+        return self.pos
+
+    def read(self, size: int = -1) -> bytes:
+        end = len(self.buffer) if size < 0 else min(self.pos + size, len(self.buffer))
+        ret = self._data[self.pos:end]
+        self.pos = end
+        return ret
+
+
+    # Structured reads
+    def struct(self, fmt: str) -> Struct:
+        """Returns a cached Struct for fmt in this view's byte order."""
+        st = self._structs.get(fmt)
+
+        if st is None:
+            st = self._structs[fmt] = Struct(self.endian + fmt)
+
+        return st
+
+    def read_struct(self, st: Struct | str, offset: int | None = None) -> tuple:
+        if isinstance(st, str):
+            st = self.struct(st)
+
+        if offset is None:
+            offset = self.pos
+            self.pos += st.size
+
+        return st.unpack_from(self.buffer, offset)
+
+    def read_array(self, dtype, count: int, offset: int | None = None) -> np.ndarray:
+        """
+        Returns a read-only numpy view of count elements, without copying.
+        Copy the result before modifying it in place.
+        """
+        dtype = np.dtype(dtype).newbyteorder(self.endian)
+
+        if offset is None:
+            offset = self.pos
+            self.pos += dtype.itemsize * count
+
+        return np.frombuffer(self.buffer, dtype=dtype, count=count, offset=offset)
+
+    def read_string(self, size: int = 0, offset: int | None = None, encoding: str = "utf-8") -> str:
+        start = self.pos if offset is None else offset
+
+        if size == 0:
+            end = self._data.find(b"\0", start)
+            if end == -1:
+                raise ValueError("Unterminated string at %#x" % (start))
+            advance = end - start + 1
+        else:
+            end = start + size
+            advance = size
+
+        if offset is None:
+            self.pos += advance
+
+        return bytes(self.buffer[start:end]).decode(encoding)
+
+
+    # Scalars
+    def read_ubyte(self, offset: int | None = None) -> int:
+        return self.read_struct(_STRUCTS[self.endian]['B'], offset)[0]
+
+    def read_byte(self, offset: int | None = None) -> int:
+        return self.read_struct(_STRUCTS[self.endian]['b'], offset)[0]
+
+    def read_uint16(self, offset: int | None = None) -> int:
+        return self.read_struct(_STRUCTS[self.endian]['H'], offset)[0]
+
+    def read_sint16(self, offset: int | None = None) -> int:
+        return self.read_struct(_STRUCTS[self.endian]['h'], offset)[0]
+
+    def read_uint32(self, offset: int | None = None) -> int:
+        return self.read_struct(_STRUCTS[self.endian]['L'], offset)[0]
+
+    def read_sint32(self, offset: int | None = None) -> int:
+        return self.read_struct(_STRUCTS[self.endian]['l'], offset)[0]
+
+    def read_uint64(self, offset: int | None = None) -> int:
+        return self.read_struct(_STRUCTS[self.endian]['Q'], offset)[0]
+
+    def read_sint64(self, offset: int | None = None) -> int:
+        return self.read_struct(_STRUCTS[self.endian]['q'], offset)[0]
+
+    def read_float(self, offset: int | None = None) -> float:
+        return self.read_struct(_STRUCTS[self.endian]['f'], offset)[0]
+
 
 def ReadMatrix(f: BufferedReader) -> Matrix:
     Mat = mathutils.Matrix() # type: ignore
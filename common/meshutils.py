@@ -5,7 +5,7 @@ import sys
 import os
 import bpy
 import importlib
-from io import BufferedReader
+import numpy as np
 from mathutils import Vector
 from typing import TYPE_CHECKING
 
@@ -17,7 +17,7 @@ if TYPE_CHECKING:
     import DMC3.motion
 
 import common.io
-from common.io import ReadFloat, ReadSInt16, ReadByte, ReadUByte
+from common.io import BinaryView, float32, int16, ubyte
 
 importlib.reload(common.io)
 
@@ -71,57 +71,93 @@ def GetTris(verts: list[Vector], nrmls: list[Vector], triSkip: list[int], numVer
     return tris
 
 
+def _Dot(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    # Vector.dot() (dot_vn_vn): float32 products summed in double, last component first
+    return (a[:, 2] * b[:, 2]).astype(np.float64) + (a[:, 1] * b[:, 1]) + (a[:, 0] * b[:, 0])
+
+
+def _Normalized(vecs: np.ndarray) -> np.ndarray:
+    # Vector.normalize() (normalize_vn_vn): double squared length, rows at or
+    # below 1e-35 zeroed, then a float32 multiply by 1 / float32(length)
+    lengthSq = _Dot(vecs, vecs)
+    valid = lengthSq > 1e-35
+    length = np.sqrt(lengthSq, where=valid, out=np.ones_like(lengthSq)).astype(float32)
+    return np.where(valid[:, None], vecs * (np.float32(1.) / length)[:, None], np.float32(0.))
+
+
+def GetTrisArray(verts: np.ndarray, nrmls: np.ndarray, triSkip: np.ndarray, numVerts: int) -> np.ndarray:
+    """
+    Vectorized GetTris: expands the whole strip at once and returns an (M,3) int32
+    index array with the same triangles and winding as the scalar version.
+    The winding test repeats mathutils' arithmetic (float32 vectors, double
+    lengths and dot product, tiny vectors zeroed), so the result is bit-identical.
+    """
+    if numVerts < 3:
+        return np.empty((0, 3), dtype=np.int32)
+
+    # (p1, p2, p3) windows over the strip, dropping the restart triangles
+    windows = np.lib.stride_tricks.sliding_window_view(np.arange(numVerts, dtype=np.int32), 3)
+    windows = windows[ ~np.asarray(triSkip[2:numVerts], dtype=bool) ]
+
+    verts = np.asarray(verts, dtype=np.float32)
+    nrmls = np.asarray(nrmls, dtype=np.float32)
+    p1, p2, p3 = windows[:, 0], windows[:, 1], windows[:, 2]
+
+    # face normal from the triangle edges
+    faceEdge1 = _Normalized(verts[p3] - verts[p1])
+    faceEdge2 = _Normalized(verts[p2] - verts[p1])
+    z = _Normalized( np.cross(faceEdge1, faceEdge2) )
+
+    # summed vertex normals
+    normal = _Normalized(nrmls[p1] + nrmls[p2] + nrmls[p3])
+
+    # flip the triangles that face away from the imported normals
+    facing = _Dot(normal, z) > 0.
+    tris = np.where(facing[:, None], windows[:, [0, 2, 1]], windows)
+
+    return np.ascontiguousarray(tris, dtype=np.int32)
+
+
 #=====================================================================
 #   Vertex decoding
 #=====================================================================
-def ParseVerts(self: DMC3.model.Mesh, f: BufferedReader, modelHdr) -> None:
-    #POSITIONS
-    f.seek(self.positionsOffs)
-    self.positions = [ Vector([ReadFloat(f), ReadFloat(f), ReadFloat(f)]) for _ in range(self.vertCount) ]
+def ParseVerts(self: DMC3.model.Mesh, f: BinaryView, modelHdr) -> None:
+    vertCount = self.vertCount
+
+    #POSITIONS (N,3), read-only view into the file
+    self.positions = f.read_array(float32, vertCount * 3, self.positionsOffs).reshape(vertCount, 3)
  
-    #NORMALS
-    f.seek(self.normalsOffs)
-    self.normals = [ Vector([ReadFloat(f), ReadFloat(f), ReadFloat(f)]) for _ in range(self.vertCount) ]
+    #NORMALS (N,3), read-only view into the file
+    self.normals = f.read_array(float32, vertCount * 3, self.normalsOffs).reshape(vertCount, 3)
     
-    #TEXTURE COORDINATES
-    f.seek(self.UVsOffs)
-    self.UVs = [ Vector([ReadSInt16(f)/4096., (1. - ReadSInt16(f)/4096.)]) for _ in range(self.vertCount) ]
+    #TEXTURE COORDINATES (N,2), 4.12 fixed point with V flipped
+    self.UVs = f.read_array(int16, vertCount * 2, self.UVsOffs).reshape(vertCount, 2).astype(float32) / 4096.
+    self.UVs[:, 1] = 1. - self.UVs[:, 1]
 
 
-    #BONE INDICES
+    #BONE INDICES (N,3), 4-byte stride with an unused leading byte
     if modelHdr.Id != "SCM ":
-        f.seek(self.boneIndiciesOffs)
-
-        for _ in range(self.vertCount):
-            ReadByte(f)
-            self.boneIndicies.append( [ReadUByte(f)//4, ReadUByte(f)//4, ReadUByte(f)//4] )
+        indices = f.read_array(ubyte, vertCount * 4, self.boneIndiciesOffs).reshape(vertCount, 4)
+        self.boneIndicies = indices[:, 1:] // 4
 
 
-        #BONE WEIGHTS
-        f.seek(self.weightsOffs)
+        #BONE WEIGHTS (N,3), packed 5-5-5 with the strip restart flag in the top bit
+        w = f.read_array(int16, vertCount, self.weightsOffs)
+        shifts = np.array([0, 5, 10], dtype=int16)
 
-        for _ in range(self.vertCount):
-            w = ReadSInt16(f)
-
-            w1 = (w & 0x1f) / 31.
-            w2 = ( (w >> 5) & 0x1f) / 31.
-            w3 = ( (w >> 10) & 0x1f) / 31.
-
-            self.triSkip.append( (w >> 15) & 1 )
-            self.boneWeights.append( [w1, w2, w3] )
+        self.boneWeights = ( (w[:, None] >> shifts) & 0x1f ).astype(float32) / 31.
+        self.triSkip = ( (w >> 15) & 1 ).astype(bool)
 
         # FACES
-        self.faces = GetTris(self.positions, self.normals, self.triSkip, self.vertCount)
+        self.faces = GetTrisArray(self.positions, self.normals, self.triSkip, self.vertCount)
 
-    # VERTEX COLOUR
+    # VERTEX COLOUR (N,4) RGBA, the alpha byte carries the strip restart flag
     else:
-        f.seek(self.uknOffs)
+        colours = f.read_array(ubyte, vertCount * 4, self.uknOffs).reshape(vertCount, 4)
 
-        for _ in range(self.vertCount):
-            self.vertColour.append( (ReadUByte(f)/255., ReadUByte(f)/255., ReadUByte(f)/255., 1.) )
-            self.triSkip.append(ReadUByte(f) & 2)
+        self.vertColour = np.ones((vertCount, 4), dtype=float32)
+        self.vertColour[:, :3] = colours[:, :3] / np.float32(255.)
+        self.triSkip = (colours[:, 3] & 2).astype(bool)
 
         # FACES
-        self.faces = GetTris(self.positions, self.normals, self.triSkip, self.vertCount)
-
-
+        self.faces = GetTrisArray(self.positions, self.normals, self.triSkip, self.vertCount)
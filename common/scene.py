@@ -1,5 +1,6 @@
 #common\scene.py:
 import bpy
+import numpy as np
 
 def clear_animations() -> None:
     actions_to_remove = [action for action in bpy.data.actions if action.users == 0]
@@ -25,3 +26,39 @@ def frame_timeline(context: bpy.types.Context) -> None:
                             editor_actions[area.type]()
 
 
+
+# RNA enum values of Keyframe.interpolation and Keyframe.handle_*_type, for foreach_set
+INTERPOLATION = {'CONSTANT': 0, 'LINEAR': 1, 'BEZIER': 2}
+HANDLE_TYPE = {'FREE': 0, 'AUTO': 1, 'VECTOR': 2, 'ALIGNED': 3, 'AUTO_CLAMPED': 4}
+
+def fill_fcurve(fcurve: bpy.types.FCurve, frames, values, interpolation: str = 'BEZIER',
+                handle_left=None, handle_right=None) -> None:
+    """
+    Writes all keys of an empty F-curve in one go. Without explicit handles the
+    keys get auto-clamped handles, like keyframe_points.insert; with them
+    (arrays of (frame, value) pairs) the handles are free.
+    """
+    count = len(frames)
+    if count == 0:
+        return
+
+    points = fcurve.keyframe_points
+    points.add(count)
+
+    co = np.empty((count, 2), dtype=np.float32)
+    co[:, 0] = frames
+    co[:, 1] = values
+    points.foreach_set("co", co.ravel())
+    points.foreach_set("interpolation", np.full(count, INTERPOLATION[interpolation], dtype=np.int32))
+
+    handle_type = 'AUTO_CLAMPED' if handle_left is None else 'FREE'
+    types = np.full(count, HANDLE_TYPE[handle_type], dtype=np.int32)
+    points.foreach_set("handle_left_type", types)
+    points.foreach_set("handle_right_type", types)
+
+    if handle_left is not None:
+        points.foreach_set("handle_left", np.asarray(handle_left, dtype=np.float32).ravel())
+        points.foreach_set("handle_right", np.asarray(handle_right, dtype=np.float32).ravel())
+
+    # one sort + handle recalculation for the whole curve (free handles are kept)
+    fcurve.update()